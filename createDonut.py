@@ -1,9 +1,23 @@
 import os
+import math
+import struct
+import warnings
+from collections import OrderedDict
 from geographiclib.geodesic import Geodesic
+# pyproj solves the direct geodesic problem for whole arrays of points in
+# compiled code. Fall back to geographiclib when it is not available.
+try:
+    import numpy as np
+    from pyproj import Geod, Transformer
+    from pyproj.transformer import TransformerGroup
+    _pgeod = Geod(ellps='WGS84')
+except Exception:
+    _pgeod = None
 
 from qgis.core import (
-    QgsPointXY, QgsGeometry, QgsField,
-    QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsPropertyDefinition)
+    QgsGeometry, QgsField,
+    QgsProject, QgsWkbTypes, QgsCoordinateTransform, QgsCsException,
+    QgsPropertyDefinition)
 
 from qgis.core import (
     QgsProcessing,
@@ -17,9 +31,54 @@ from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtCore import QVariant, QUrl
 
 from .settings import settings, epsg4326, geod
-from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositive, hasIdlCrossing
+from .utils import tr, conversionToMeters, DISTANCE_LABELS, makeIdlCrossingsPositiveLons, hasIdlCrossingLons
 
 SHAPE_TYPE = [tr("Polygon"), tr("Line")]
+EARTH_RADIUS = 6371008.8  # Mean earth radius in meters used by the spherical model
+LL_MASK = Geodesic.LATITUDE | Geodesic.LONGITUDE
+LINE_CAPS = LL_MASK | Geodesic.DISTANCE_IN
+# WKB geometry type codes
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTILINESTRING = 5
+RING_CACHE_MAX = 2048  # Maximum number of cached rings for repeated input points
+
+
+def _ringWkb(xs, ys):
+    '''Return the little endian WKB point count and coordinates of a ring or line.'''
+    n = len(xs)
+    if _pgeod and isinstance(xs, np.ndarray):
+        coords = np.empty((n, 2), dtype='<f8')
+        coords[:, 0] = xs
+        coords[:, 1] = ys
+        return(struct.pack('<I', n) + coords.tobytes())
+    coords = [c for xy in zip(xs, ys) for c in xy]
+    return(struct.pack('<I{}d'.format(2 * n), n, *coords))
+
+
+def _staticPropertyValue(prop, exp_context):
+    '''Return the value of a data defined property as a float if it is the same for
+    every feature, otherwise None.'''
+    try:
+        is_static, value = prop.isStaticValueInContext(exp_context)
+    except AttributeError:
+        # isStaticValueInContext was added in QGIS 3.24
+        return None
+    if not is_static:
+        return None
+    try:
+        return(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _isWgs84Geographic(crs):
+    '''Return True if coordinates in crs are the same as EPSG:4326 coordinates. This
+    is the case for EPSG:4326 itself and for geographic CRSs on the WGS 84 ellipsoid
+    using the Greenwich meridian, so no transformation is needed.'''
+    if crs == epsg4326 or crs.authid() == 'EPSG:4326':
+        return(True)
+    return(crs.isGeographic() and crs.ellipsoidAcronym() == epsg4326.ellipsoidAcronym() and '+pm=' not in crs.toProj())
 
 
 class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
@@ -33,6 +92,7 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     PrmUnitsOfMeasure = 'UnitsOfMeasure'
     PrmDrawingSegments = 'DrawingSegments'
     PrmExportInputGeometry = 'ExportInputGeometry'
+    PrmUseSphere = 'UseSphere'
 
     def createInstance(self):
         return CreateDonutAlgorithm()
@@ -67,13 +127,17 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
     def outputWkbType(self, input_wkb_type):
         if self.shape_type == 0:
             return (QgsWkbTypes.Polygon)
-        return (QgsWkbTypes.LineString)
+        if self.single_line:
+            return (QgsWkbTypes.LineString)
+        return (QgsWkbTypes.MultiLineString)
 
     def outputFields(self, input_fields):
         if self.export_geom:
             name_x, name_y = settings.getGeomNames(input_fields.names())
             input_fields.append(QgsField(name_x, QVariant.Double))
             input_fields.append(QgsField(name_y, QVariant.Double))
+            self.name_x_idx = input_fields.count() - 2
+            self.name_y_idx = input_fields.count() - 1
         return(input_fields)
 
     def  supportInPlaceEdit(self, layer):
@@ -81,6 +145,7 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
 
     def initParameters(self, config=None):
         self.shape_type = 0
+        self.single_line = False
         self.export_geom = False
         self.addParameter(
             QgsProcessingParameterEnum(
@@ -144,6 +209,13 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
                 False,
                 optional=True)
         )
+        self.addParameter(
+            QgsProcessingParameterBoolean(
+                self.PrmUseSphere,
+                tr('Use faster spherical earth model'),
+                False,
+                optional=True)
+        )
 
     def prepareAlgorithm(self, parameters, context, feedback):
         self.shape_type = self.parameterAsInt(parameters, self.PrmShapeType, context)
@@ -151,16 +223,34 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         if self.outer_radius <= 0:
             feedback.reportError('Outer radius parameter must be greater than 0')
             return False
+        source = self.parameterAsSource(parameters, 'INPUT', context)
+        # Expressions that give the same value for every feature, such as 10 * 2,
+        # are evaluated once here rather than for each feature.
+        exp_context = self.createExpressionContext(parameters, context, source)
         self.outer_radius_dyn = QgsProcessingParameters.isDynamic(parameters, self.PrmOuterRadius)
         if self.outer_radius_dyn:
             self.outer_radius_property = parameters[self.PrmOuterRadius]
+            value = _staticPropertyValue(self.outer_radius_property, exp_context)
+            if value is not None:
+                if value <= 0:
+                    feedback.reportError('Outer radius parameter must be greater than 0')
+                    return False
+                self.outer_radius = value
+                self.outer_radius_dyn = False
         self.inner_radius = self.parameterAsDouble(parameters, self.PrmInnerRadius, context)
         self.inner_radius_dyn = QgsProcessingParameters.isDynamic(parameters, self.PrmInnerRadius)
         if self.inner_radius_dyn:
             self.inner_radius_property = parameters[self.PrmInnerRadius]
+            value = _staticPropertyValue(self.inner_radius_property, exp_context)
+            if value is not None:
+                self.inner_radius = value
+                self.inner_radius_dyn = False
+        # Lines with no inner ring for any feature are output as single LineStrings
+        self.single_line = self.shape_type == 1 and not self.inner_radius_dyn and self.inner_radius == 0
         segments = self.parameterAsInt(parameters, self.PrmDrawingSegments, context)
         units = self.parameterAsInt(parameters, self.PrmUnitsOfMeasure, context)
         self.export_geom = self.parameterAsBool(parameters, self.PrmExportInputGeometry, context)
+        self.use_sphere = self.parameterAsBool(parameters, self.PrmUseSphere, context)
 
         self.measure_factor = conversionToMeters(units)
 
@@ -168,91 +258,316 @@ class CreateDonutAlgorithm(QgsProcessingFeatureBasedAlgorithm):
         self.outer_radius_converted = self.outer_radius * self.measure_factor
 
         self.pt_spacing = 360.0 / segments
-        source = self.parameterAsSource(parameters, 'INPUT', context)
+        # Azimuths of the ring vertices, computed once and shared by all features
+        self._n_seg = segments
+        if _pgeod:
+            self._angles = np.arange(segments, dtype=np.float64) * self.pt_spacing
+            # The outer and inner rings are solved together so repeat the azimuths
+            # for both rings. Each ring has an extra slot for its closing vertex.
+            # Only the first half is used when there is no inner ring.
+            self._azimuths = np.tile(np.append(self._angles, 0.0), 2)
+            if self.use_sphere:
+                self._sin_a = np.sin(np.radians(self._azimuths))
+                self._cos_a = np.cos(np.radians(self._azimuths))
+        else:
+            self._angles = [i * self.pt_spacing for i in range(segments)]
+            if self.use_sphere:
+                self._sin_a = [math.sin(math.radians(a)) for a in self._angles]
+                self._cos_a = [math.cos(math.radians(a)) for a in self._angles]
         src_crs = source.sourceCrs()
         self.total_features = source.featureCount()
 
-        if src_crs != epsg4326:
+        self._to_sink_tf = None
+        if not _isWgs84Geographic(src_crs):
             self.geom_to_4326 = QgsCoordinateTransform(src_crs, epsg4326, QgsProject.instance())
             self.to_sink_crs = QgsCoordinateTransform(epsg4326, src_crs, QgsProject.instance())
+            if _pgeod:
+                self._to_sink_tf = self.pyprojSinkTransformer(src_crs)
         else:
             self.geom_to_4326 = None
             self.to_sink_crs = None
+        # Least recently used cache of rings keyed on the origin and radii
+        self._ring_cache = OrderedDict()
         self.num_bad = 0
         return True
 
+    def pyprojSinkTransformer(self, src_crs):
+        '''Return a pyproj Transformer that transforms whole rings from EPSG:4326 to
+        src_crs with the same coordinate operation as self.to_sink_crs, or None if that
+        cannot be guaranteed. The input points are transformed by QGIS so the rings must
+        use the same operation or the donuts would be offset from their points.'''
+        try:
+            operation = self.to_sink_crs.coordinateOperation()
+        except AttributeError:
+            # QGIS versions before 3.8 do not expose the coordinate operation
+            return(None)
+        if operation:
+            # The project pins the operation, possibly for the reverse direction which
+            # QGIS handles internally, so leave the rings to QgsCoordinateTransform.
+            return(None)
+        # Only use pyproj when there is a single possible operation so that QGIS and
+        # pyproj cannot choose different ones.
+        try:
+            with warnings.catch_warnings():
+                # pyproj warns when grids are missing, which just means the QGIS transform is used
+                warnings.simplefilter('ignore')
+                group = TransformerGroup('EPSG:4326', src_crs.authid() or src_crs.toWkt(), always_xy=True)
+        except Exception:
+            # Custom CRSs that pyproj cannot interpret
+            return(None)
+        if len(group.transformers) != 1 or group.unavailable_operations:
+            return(None)
+        transformer = group.transformers[0]
+        if not self.matchesInputTransform(transformer, src_crs):
+            return(None)
+        return(transformer)
+
+    def matchesInputTransform(self, transformer, src_crs):
+        '''Check that the pyproj ring transform agrees with the QGIS input point transform
+        by sending the center of the CRS area of use out through pyproj and back through
+        geom_to_4326. The round trip must land within a millimeter.'''
+        bounds = src_crs.bounds()
+        if bounds.isEmpty():
+            return(False)
+        center = bounds.center()
+        try:
+            x, y = transformer.transform(center.x(), center.y(), errcheck=True)
+            pt = self.geom_to_4326.transform(x, y)
+        except (QgsCsException, RuntimeError):
+            return(False)
+        return(geod.Inverse(center.y(), center.x(), pt.y(), pt.x(), Geodesic.DISTANCE)['s12'] < 0.001)
+
     def processFeature(self, feature, context, feedback):
+        params = self.featureParameters(feature, context)
+        if not params:
+            self.num_bad += 1
+            return []
+        rings = self.safeRings(params[2:])
+        if rings is None or not self.setDonutGeometry(feature, rings, params[0], params[1]):
+            self.num_bad += 1
+            return []
+        return [feature]
+
+    def featureParameters(self, feature, context):
+        '''Return the original x, y, the EPSG:4326 lat, lon and the outer and inner radius
+        in meters of a feature, or None if its geometry or radius parameters are invalid.'''
+        geom = feature.geometry()
+        if geom.isNull() or geom.isEmpty():
+            return None
         try:
-            pts_in = []
-            pts_out = []
-            pt = feature.geometry().asPoint()
+            if geom.isMultipart():
+                # Use the first point of a multipoint
+                pt = geom.asMultiPoint()[0]
+            else:
+                pt = geom.asPoint()
             pt_orig_x = pt.x()
             pt_orig_y = pt.y()
             # make sure the coordinates are in EPSG:4326
             if self.geom_to_4326:
                 pt = self.geom_to_4326.transform(pt.x(), pt.y())
-            lat = pt.y()
-            lon = pt.x()
-            if self.inner_radius_dyn:
-                inner_rad, e = self.inner_radius_property.valueAsDouble(context.expressionContext(), self.inner_radius)
-                if not e:
-                    self.num_bad += 1
-                    return []
-                inner_rad *= self.measure_factor
-            else:
-                inner_rad = self.inner_radius_converted
-            if self.outer_radius_dyn:
-                outer_rad, e = self.outer_radius_property.valueAsDouble(context.expressionContext(), self.outer_radius)
-                outer_rad *= self.measure_factor
-                if not e or outer_rad <= 0:
-                    self.num_bad += 1
-                    return []
+        except (ValueError, TypeError, QgsCsException):
+            # Invalid point geometry or a point that cannot be transformed
+            return None
+        lat = pt.y()
+        lon = pt.x()
+        if self.inner_radius_dyn or self.outer_radius_dyn:
+            exp_context = context.expressionContext()
+            mf = self.measure_factor
+        if self.inner_radius_dyn:
+            inner_rad, e = self.inner_radius_property.valueAsDouble(exp_context, self.inner_radius)
+            if not e:
+                return None
+            inner_rad = inner_rad * mf
+        else:
+            inner_rad = self.inner_radius_converted
+        if self.outer_radius_dyn:
+            outer_rad, e = self.outer_radius_property.valueAsDouble(exp_context, self.outer_radius)
+            if not e or outer_rad <= 0:
+                return None
+            outer_rad = outer_rad * mf
+        else:
+            outer_rad = self.outer_radius_converted
+        return(pt_orig_x, pt_orig_y, lat, lon, outer_rad, inner_rad)
+
+    def safeRings(self, params):
+        '''Call computeRings with (lat, lon, outer_rad, inner_rad) returning None on failure.
+        Rings of recently seen points are returned from the cache. The cached rings are
+        never modified after they are computed so they can be shared.'''
+        lat, lon, outer_rad, inner_rad = params
+        key = (round(lat, 9), round(lon, 9), outer_rad, inner_rad)
+        rings = self._ring_cache.get(key)
+        if rings is not None:
+            self._ring_cache.move_to_end(key)
+            return(rings)
+        try:
+            rings = self.computeRings(lat, lon, outer_rad, inner_rad)
+        except (ValueError, IndexError, RuntimeError):
+            # Math domain errors or geodesic failures from pyproj
+            return None
+        self._ring_cache[key] = rings
+        if len(self._ring_cache) > RING_CACHE_MAX:
+            self._ring_cache.popitem(last=False)
+        return(rings)
+
+    def computeRings(self, lat, lon, outer_rad, inner_rad):
+        '''Return the closed outer and inner ring longitudes and latitudes in EPSG:4326.'''
+        # The ring coordinates are kept as longitude and latitude sequences
+        # until they are written into the geometry WKB.
+        if _pgeod:
+            lons_out, lats_out, lons_in, lats_in = self.vectorRings(lat, lon, outer_rad, inner_rad)
+        elif self.use_sphere:
+            lons_out, lats_out = self.sphereRing(lat, lon, outer_rad)
+            if inner_rad != 0:
+                lons_in, lats_in = self.sphereRing(lat, lon, inner_rad)
             else:
-                outer_rad = self.outer_radius_converted
-            angle = 0
-            while angle < 360:
-                if inner_rad != 0:
-                    g = geod.Direct(lat, lon, angle, inner_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                    pts_in.append(QgsPointXY(g['lon2'], g['lat2']))
-                g = geod.Direct(lat, lon, angle, outer_rad, Geodesic.LATITUDE | Geodesic.LONGITUDE)
-                pts_out.append(QgsPointXY(g['lon2'], g['lat2']))
-                angle += self.pt_spacing
+                lons_in = lats_in = None
+        else:
+            lons_in = []
+            lats_in = []
+            lons_out = []
+            lats_out = []
+            # Bind the methods used for every vertex to locals to avoid repeated attribute lookups
+            geod_line = geod.Line
+            append_lon_in = lons_in.append
+            append_lat_in = lats_in.append
+            append_lon_out = lons_out.append
+            append_lat_out = lats_out.append
+            ll_mask = LL_MASK
+            has_inner = inner_rad != 0
+            for angle in self._angles:
+                # The inner and outer vertices share the same azimuth so set up
+                # the geodesic line once and solve for both distances along it.
+                line = geod_line(lat, lon, angle, LINE_CAPS)
+                if has_inner:
+                    g = line.Position(inner_rad, ll_mask)
+                    append_lon_in(g['lon2'])
+                    append_lat_in(g['lat2'])
+                g = line.Position(outer_rad, ll_mask)
+                append_lon_out(g['lon2'])
+                append_lat_out(g['lat2'])
             if inner_rad != 0:
-                pts_in.append(pts_in[0])
-            pts_out.append(pts_out[0])
-            crosses_idl = hasIdlCrossing(pts_out)
-            if crosses_idl:
-                if inner_rad != 0:
-                    makeIdlCrossingsPositive(pts_in, True)
-                makeIdlCrossingsPositive(pts_out, True)
-
-            # If the Output crs is not 4326 transform the points to the proper crs
-            if self.to_sink_crs:
-                if inner_rad != 0:
-                    for x, pt_out in enumerate(pts_in):
-                        pts_in[x] = self.to_sink_crs.transform(pt_out)
-                for x, pt_out in enumerate(pts_out):
-                    pts_out[x] = self.to_sink_crs.transform(pt_out)
-
-            if self.shape_type == 0:
-                if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out]))
-                else:
-                    feature.setGeometry(QgsGeometry.fromPolygonXY([pts_out, pts_in]))
+                lons_in.append(lons_in[0])
+                lats_in.append(lats_in[0])
             else:
-                if inner_rad == 0:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out]))
-                else:
-                    feature.setGeometry(QgsGeometry.fromMultiPolylineXY([pts_out, pts_in]))
-            if self.export_geom:
-                attr = feature.attributes()
-                attr.append(pt_orig_x)
-                attr.append(pt_orig_y)
-                feature.setAttributes(attr)
-        except Exception:
-            self.num_bad += 1
-            return []
-        return [feature]
+                lons_in = lats_in = None
+            lons_out.append(lons_out[0])
+            lats_out.append(lats_out[0])
+        if hasIdlCrossingLons(lons_out):
+            if lons_in is not None:
+                makeIdlCrossingsPositiveLons(lons_in, True)
+            makeIdlCrossingsPositiveLons(lons_out, True)
+        return(lons_out, lats_out, lons_in, lats_in)
+
+    def setDonutGeometry(self, feature, rings, pt_orig_x, pt_orig_y):
+        '''Set the donut geometry and optional input geometry attributes of the feature.
+        Returns False if the geometry could not be created.'''
+        lons_out, lats_out, lons_in, lats_in = rings
+        try:
+            rings_xy = [self.sinkCoords(lons_out, lats_out)]
+            if lons_in is not None:
+                rings_xy.append(self.sinkCoords(lons_in, lats_in))
+        except (QgsCsException, RuntimeError):
+            # The rings could not be transformed to the output CRS
+            return False
+        # Build the geometry from WKB so the vertices are passed to QGIS as
+        # one buffer rather than one QgsPointXY at a time.
+        if self.shape_type == 0:
+            wkb = struct.pack('<BII', 1, WKB_POLYGON, len(rings_xy))
+            wkb += b''.join(_ringWkb(xs, ys) for xs, ys in rings_xy)
+        elif self.single_line:
+            wkb = struct.pack('<BI', 1, WKB_LINESTRING) + _ringWkb(*rings_xy[0])
+        else:
+            wkb = struct.pack('<BII', 1, WKB_MULTILINESTRING, len(rings_xy))
+            line_header = struct.pack('<BI', 1, WKB_LINESTRING)
+            wkb += b''.join(line_header + _ringWkb(xs, ys) for xs, ys in rings_xy)
+        geom = QgsGeometry()
+        geom.fromWkb(wkb)
+        feature.setGeometry(geom)
+        if self.export_geom:
+            feature.resizeAttributes(self.name_y_idx + 1)
+            feature.setAttribute(self.name_x_idx, pt_orig_x)
+            feature.setAttribute(self.name_y_idx, pt_orig_y)
+        return True
+
+    def sinkCoords(self, lons, lats):
+        '''Return the x and y coordinates in the output CRS of EPSG:4326 longitudes and latitudes.'''
+        if self._to_sink_tf:
+            # errcheck makes failed projections raise ProjError instead of returning inf
+            return(self._to_sink_tf.transform(lons, lats, errcheck=True))
+        if self.to_sink_crs:
+            pts = [self.to_sink_crs.transform(x, y) for x, y in zip(lons, lats)]
+            return([pt.x() for pt in pts], [pt.y() for pt in pts])
+        return(lons, lats)
+
+    def vectorRings(self, lat, lon, outer_rad, inner_rad):
+        '''Return numpy arrays of the closed outer and inner ring longitudes and
+        latitudes around lat, lon. The inner arrays are None when inner_rad is 0.'''
+        # Number of vertices in a closed ring
+        n = self._n_seg + 1
+        if inner_rad == 0:
+            dists = np.full(n, outer_rad)
+        else:
+            dists = np.repeat((outer_rad, inner_rad), n)
+        if self.use_sphere:
+            lons, lats = self.sphereArrays(lat, lon, dists)
+        else:
+            m = dists.size
+            lons, lats, _ = _pgeod.fwd(np.full(m, lon), np.full(m, lat), self._azimuths[:m], dists)
+        # The rings are views into the computed arrays. Make sure the closing
+        # vertices exactly match the first ones.
+        lons_out = lons[:n]
+        lats_out = lats[:n]
+        lons_out[-1] = lons_out[0]
+        lats_out[-1] = lats_out[0]
+        if inner_rad == 0:
+            return(lons_out, lats_out, None, None)
+        lons_in = lons[n:]
+        lats_in = lats[n:]
+        lons_in[-1] = lons_in[0]
+        lats_in[-1] = lats_in[0]
+        return(lons_out, lats_out, lons_in, lats_in)
+
+    def sphereArrays(self, lat, lon, dists):
+        '''Return numpy arrays of the longitudes and latitudes at distances dists in
+        meters from lat, lon along the precomputed azimuths on a spherical earth.'''
+        m = dists.size
+        d = dists / EARTH_RADIUS
+        lat1 = math.radians(lat)
+        sin_lat1 = math.sin(lat1)
+        cos_lat1 = math.cos(lat1)
+        sin_d = np.sin(d)
+        cos_d = np.cos(d)
+        lats = np.arcsin(sin_lat1 * cos_d + cos_lat1 * sin_d * self._cos_a[:m])
+        lons = math.radians(lon) + np.arctan2(self._sin_a[:m] * sin_d * cos_lat1, cos_d - sin_lat1 * np.sin(lats))
+        lons = (np.degrees(lons) + 180.0) % 360.0 - 180.0
+        return(lons, np.degrees(lats))
+
+    def sphereRing(self, lat, lon, radius):
+        '''Return lists of the longitudes and latitudes of a closed circle of radius
+        meters around lat, lon computed on a spherical earth.'''
+        d = radius / EARTH_RADIUS
+        lat1 = math.radians(lat)
+        lon1 = math.radians(lon)
+        sin_lat1 = math.sin(lat1)
+        cos_lat1 = math.cos(lat1)
+        sin_d = math.sin(d)
+        cos_d = math.cos(d)
+        lons = []
+        lats = []
+        append_lon = lons.append
+        append_lat = lats.append
+        asin = math.asin
+        atan2 = math.atan2
+        sin = math.sin
+        degrees = math.degrees
+        for sin_a, cos_a in zip(self._sin_a, self._cos_a):
+            lat2 = asin(sin_lat1 * cos_d + cos_lat1 * sin_d * cos_a)
+            lon2 = lon1 + atan2(sin_a * sin_d * cos_lat1, cos_d - sin_lat1 * sin(lat2))
+            append_lon((degrees(lon2) + 180.0) % 360.0 - 180.0)
+            append_lat(degrees(lat2))
+        lons.append(lons[0])
+        lats.append(lats[0])
+        return(lons, lats)
 
     def postProcessAlgorithm(self, context, feedback):
         if self.num_bad:
@@ -1,5 +1,9 @@
 import math
 import re
+try:
+    import numpy as np
+except Exception:
+    np = None
 from qgis.core import QgsUnitTypes, QgsPointXY
 from qgis.PyQt.QtCore import QCoreApplication
 
@@ -31,12 +35,18 @@ def conversionToMeters(units):
     return measureFactor
 
 def hasIdlCrossing(pts):
-    ptlen = len(pts)
-    if(ptlen == 0):
+    return(hasIdlCrossingLons([pt.x() for pt in pts]))
+
+def hasIdlCrossingLons(lons):
+    '''Same as hasIdlCrossing but on a list or numpy array of longitudes.'''
+    if(len(lons) == 0):
         return(False)
-    x_last = pts[0].x()
-    for i in range(1, ptlen):
-        x = pts[i].x()
+    x_last = lons[0]
+    if np is not None and isinstance(lons, np.ndarray):
+        rest = lons[1:]
+        other_side = rest >= 0 if x_last < 0 else rest < 0
+        return(bool(np.any(other_side & (np.abs(rest - x_last) > 180))))
+    for x in lons[1:]:
         if (x_last < 0 and x >= 0):
             if (x - x_last) > 180:
                 return(True)
@@ -53,6 +63,16 @@ def makeIdlCrossingsPositive(pts, force=False):
             if x < 0:
                 pts[i].setX(x + 360)
 
+def makeIdlCrossingsPositiveLons(lons, force=False):
+    '''Same as makeIdlCrossingsPositive but modifies a list or numpy array of longitudes in place.'''
+    if force or hasIdlCrossingLons(lons):
+        if np is not None and isinstance(lons, np.ndarray):
+            lons[lons < 0] += 360
+            return
+        for i, x in enumerate(lons):
+            if x < 0:
+                lons[i] = x + 360
+
 def normalizeLongitude(pts):
     ptlen = len(pts)
     for i in range(ptlen):